@@ -0,0 +1,200 @@
+import argparse
+import logging
+import os
+import sqlite3
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from sqlalchemy.engine import make_url
+import dotenv
+
+dotenv.load_dotenv()
+
+logger = logging.getLogger("api.backup")
+
+SNAPSHOT_PREFIX = "yapper-"
+SNAPSHOT_SUFFIX = ".db"
+
+# pages copied per step, the source is only read-locked while a step runs
+PAGES_PER_STEP = int(os.getenv("BACKUP_PAGES_PER_STEP", "64"))
+# pause between steps so writers can take the lock
+STEP_SLEEP = float(os.getenv("BACKUP_STEP_SLEEP", "0.005"))
+# a write from another connection restarts a paged backup, after this many
+# restarts the remaining copy is done in a single step instead. the app runs
+# the database in WAL mode, so that long read doesn't block writers either
+MAX_RESTARTS = 5
+
+
+class BackupRestarted(Exception):
+    pass
+
+
+def database_path(url=None):
+    """Filesystem path of the SQLite database behind DATABASE_URL"""
+    url = make_url(url or os.getenv("DATABASE_URL"))
+    if url.get_backend_name() != "sqlite" or not url.database or url.database == ":memory:":
+        raise ValueError(f"Not a SQLite database file: {url}")
+    return Path(url.database)
+
+
+def online_backup(source_path, dest_path, pages=None, sleep=None):
+    """Copy a live database with SQLite's backup API, a few pages at a time"""
+    pages = PAGES_PER_STEP if pages is None else pages
+    sleep = STEP_SLEEP if sleep is None else sleep
+    source = sqlite3.connect(source_path)
+    dest = sqlite3.connect(dest_path)
+    try:
+        restarts = 0
+        last_remaining = None
+
+        def progress(status, remaining, total):
+            nonlocal restarts, last_remaining
+            if last_remaining is not None and remaining > last_remaining:
+                restarts += 1
+                if restarts > MAX_RESTARTS:
+                    raise BackupRestarted()
+            last_remaining = remaining
+
+        try:
+            source.backup(dest, pages=pages, progress=progress, sleep=sleep)
+        except BackupRestarted:
+            logger.warning("Backup kept restarting under writes, copying in one step")
+            source.backup(dest)
+    finally:
+        dest.close()
+        source.close()
+
+
+def snapshot_name(now=None):
+    now = now or datetime.now(timezone.utc)
+    return f"{SNAPSHOT_PREFIX}{now.strftime('%Y%m%dT%H%M%S%fZ')}{SNAPSHOT_SUFFIX}"
+
+
+def list_snapshots(target_dir):
+    """Snapshots in target_dir, oldest first"""
+    return sorted(Path(target_dir).glob(f"{SNAPSHOT_PREFIX}*{SNAPSHOT_SUFFIX}"))
+
+
+def check_keep(keep):
+    if keep < 1:
+        raise ValueError("keep must be at least 1, or the new snapshot would be deleted")
+    return keep
+
+
+def prune_snapshots(target_dir, keep):
+    """Delete all but the newest `keep` snapshots"""
+    check_keep(keep)
+    snapshots = list_snapshots(target_dir)
+    stale = snapshots[:-keep]
+    for path in stale:
+        path.unlink()
+    return stale
+
+
+def create_snapshot(target_dir, source_path=None, keep=7):
+    """Write a new snapshot into target_dir and apply retention"""
+    check_keep(keep)
+    source_path = Path(source_path or database_path())
+    # sqlite3.connect would create an empty database, and snapshotting that
+    # would rotate the real snapshots out under a misconfigured DATABASE_URL
+    if not source_path.is_file():
+        raise FileNotFoundError(source_path)
+    target_dir = Path(target_dir)
+    target_dir.mkdir(parents=True, exist_ok=True)
+
+    final_path = target_dir / snapshot_name()
+    # write to a temp name so a half written file is never picked up as a snapshot
+    partial_path = final_path.with_suffix(".partial")
+    start = time.perf_counter()
+    try:
+        online_backup(source_path, partial_path)
+        # the copy inherits WAL mode, make it a single self contained file
+        conn = sqlite3.connect(partial_path)
+        try:
+            conn.execute("PRAGMA journal_mode=DELETE")
+        finally:
+            conn.close()
+    except Exception:
+        partial_path.unlink(missing_ok=True)
+        raise
+    os.replace(partial_path, final_path)
+    logger.info(
+        "Snapshot written",
+        extra={"snapshot": str(final_path), "duration_ms": round((time.perf_counter() - start) * 1000, 2)},
+    )
+    prune_snapshots(target_dir, keep)
+    return final_path
+
+
+def run_periodic(target_dir, interval, keep=7, source_path=None):
+    """Take a snapshot every `interval` seconds until interrupted"""
+    while True:
+        try:
+            create_snapshot(target_dir, source_path=source_path, keep=keep)
+        except Exception:
+            logger.exception("Snapshot failed")
+        time.sleep(interval)
+
+
+def restore_snapshot(snapshot_path, dest_path=None):
+    """Copy a snapshot back over the database, writers wait on the lock meanwhile"""
+    snapshot_path = Path(snapshot_path)
+    if not snapshot_path.is_file():
+        raise FileNotFoundError(snapshot_path)
+    check = sqlite3.connect(snapshot_path)
+    try:
+        result = check.execute("PRAGMA integrity_check").fetchone()[0]
+    finally:
+        check.close()
+    if result != "ok":
+        raise ValueError(f"Snapshot failed integrity check: {result}")
+    # a single step so the database is never left half restored
+    online_backup(snapshot_path, dest_path or database_path(), pages=-1)
+
+
+def positive_int(value):
+    try:
+        return check_keep(int(value))
+    except ValueError as exc:
+        raise argparse.ArgumentTypeError(str(exc))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Online SQLite backups for the Yapper database")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    snapshot = commands.add_parser("snapshot", help="take one snapshot")
+    periodic = commands.add_parser("periodic", help="take snapshots on an interval")
+    for command in (snapshot, periodic):
+        command.add_argument("--dir", default=os.getenv("BACKUP_DIR", "backups"))
+        command.add_argument("--keep", type=positive_int, default=int(os.getenv("BACKUP_KEEP", "7")))
+    periodic.add_argument("--interval", type=float, default=float(os.getenv("BACKUP_INTERVAL", "3600")))
+
+    restore = commands.add_parser("restore", help="restore a snapshot over the database")
+    restore.add_argument("snapshot", nargs="?", help="snapshot file, defaults to the newest in --dir")
+    restore.add_argument("--dir", default=os.getenv("BACKUP_DIR", "backups"))
+
+    listing = commands.add_parser("list", help="list snapshots")
+    listing.add_argument("--dir", default=os.getenv("BACKUP_DIR", "backups"))
+
+    args = parser.parse_args(argv)
+
+    if args.command == "snapshot":
+        print(f"📦 Snapshot written to {create_snapshot(args.dir, keep=args.keep)}")
+    elif args.command == "periodic":
+        run_periodic(args.dir, args.interval, keep=args.keep)
+    elif args.command == "restore":
+        snapshots = list_snapshots(args.dir)
+        path = args.snapshot or (snapshots[-1] if snapshots else None)
+        if path is None:
+            parser.error(f"no snapshots found in {args.dir}")
+        restore_snapshot(path)
+        print(f"✅ Restored database from {path}")
+    elif args.command == "list":
+        for path in list_snapshots(args.dir):
+            print(path)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
@@ -0,0 +1,86 @@
+"""Micro-benchmark of per-request query overhead, fresh selects vs prepared.
+
+Run from the project root:
+    python benchmarks/bench_queries.py
+"""
+import sys
+import time
+from pathlib import Path
+
+# allow imports from project root
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlalchemy.orm import selectinload
+from sqlmodel import Session, SQLModel, create_engine, select
+from sqlmodel.pool import StaticPool
+
+import queries
+from models import Post, User
+from projection import POST_LIST_COLUMNS, POST_DETAIL_COLUMNS, select_post_fields
+
+ITERATIONS = 2000
+
+
+def make_session():
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    SQLModel.metadata.create_all(engine)
+    session = Session(engine)
+    user = User(email="bench@example.com")
+    session.add(user)
+    session.commit()
+    session.add_all([Post(content=f"post {i}", user_id=user.id) for i in range(20)])
+    session.commit()
+    return session
+
+
+def fresh_request(session):
+    # what the routes did before: build every select from scratch
+    session.exec(select(User).where(User.email == "bench@example.com")).first()
+    session.exec(
+        select(Post).options(selectinload(Post.user)).order_by(Post.created_at.desc())
+    ).all()
+    session.get(Post, 1)
+
+
+def rebuilt_request(session):
+    # same column selects as prepared, but constructed on every request
+    session.exec(select(User).where(User.email == "bench@example.com")).first()
+    session.exec(
+        select_post_fields(tuple(POST_LIST_COLUMNS), POST_LIST_COLUMNS)
+        .order_by(Post.created_at.desc())
+    ).mappings().all()
+    session.exec(
+        select_post_fields(tuple(POST_DETAIL_COLUMNS), POST_DETAIL_COLUMNS)
+        .where(Post.id == 1)
+    ).mappings().first()
+
+
+def prepared_request(session):
+    session.exec(queries.user_by_email, params={"email": "bench@example.com"}).first()
+    session.exec(queries.post_list(tuple(POST_LIST_COLUMNS))).mappings().all()
+    session.exec(
+        queries.post_detail(tuple(POST_DETAIL_COLUMNS)), params={"post_id": 1}
+    ).mappings().first()
+
+
+def bench(name, request):
+    session = make_session()
+    request(session)  # warm up the compiled cache
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        request(session)
+        session.expire_all()
+    elapsed = time.perf_counter() - start
+    print(f"{name:<10} {elapsed / ITERATIONS * 1e6:8.1f} us/request")
+    session.close()
+
+
+if __name__ == "__main__":
+    bench("fresh", fresh_request)
+    bench("rebuilt", rebuilt_request)
+    bench("prepared", prepared_request)
+    print(queries.cache_stats()["compiled"])
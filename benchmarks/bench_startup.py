@@ -0,0 +1,63 @@
+"""Startup benchmark: import time, startup hook and first request latency.
+
+Each run is a fresh Python process against a temp SQLite file, the first
+run creates the schema and later runs find it already current.
+
+Run from the project root:
+    python benchmarks/bench_startup.py
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+RUNS = 5
+
+# the test client (and its httpx import) is loaded before timing starts
+PROBE = """
+import asyncio, json, sys, time
+from fastapi.testclient import TestClient
+start = time.perf_counter()
+import main
+imported = time.perf_counter()
+asyncio.run(main.app.router.startup())
+started = time.perf_counter()
+TestClient(main.app).get("/posts")
+first = time.perf_counter()
+print(json.dumps({
+    "import_ms": (imported - start) * 1000,
+    "startup_ms": (started - imported) * 1000,
+    "first_request_ms": (first - started) * 1000,
+    "authlib_loaded": "authlib" in sys.modules,
+}))
+"""
+
+
+def run_probe(db_path):
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{db_path}", LOG_LEVEL="WARNING")
+    out = subprocess.run(
+        [sys.executable, "-c", PROBE], cwd=ROOT, env=env,
+        capture_output=True, text=True, check=True,
+    ).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "yapper.db"
+        cold = run_probe(db_path)
+        warm = [run_probe(db_path) for _ in range(RUNS)]
+
+    print(f"{'':<16}{'import':>10}{'startup':>10}{'first req':>11}")
+    print(f"{'new database':<16}{cold['import_ms']:>8.1f}ms{cold['startup_ms']:>8.1f}ms{cold['first_request_ms']:>9.1f}ms")
+    print(
+        f"{'existing (med)':<16}"
+        f"{statistics.median(r['import_ms'] for r in warm):>8.1f}ms"
+        f"{statistics.median(r['startup_ms'] for r in warm):>8.1f}ms"
+        f"{statistics.median(r['first_request_ms'] for r in warm):>9.1f}ms"
+    )
+    print(f"authlib imported at startup: {cold['authlib_loaded']}")
@@ -0,0 +1,95 @@
+"""Read throughput of GET /posts with 1, 2 and 4 uvicorn workers.
+
+Each worker keeps its own read cache, invalidated through SQLite's
+PRAGMA data_version, so a few writes are mixed in to keep the caches honest.
+Throughput only scales up to the number of cores available.
+
+Run from the project root:
+    python benchmarks/bench_workers.py
+"""
+import multiprocessing
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+ROOT = Path(__file__).parent.parent
+WORKERS = (1, 2, 4)
+CLIENTS = 8
+SECONDS = 5
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def client_loop(url, deadline, results):
+    done = 0
+    with httpx.Client(base_url=url) as client:
+        while time.time() < deadline:
+            client.get("/posts?fields=id,created_at")
+            done += 1
+    results.put(done)
+
+
+def writer_loop(db_path, deadline):
+    # one write a second from outside the servers, like another worker posting
+    import sqlite3
+    conn = sqlite3.connect(db_path)
+    while time.time() < deadline:
+        conn.execute("UPDATE post SET content = content WHERE id = 1")
+        conn.commit()
+        time.sleep(1)
+    conn.close()
+
+
+def bench(workers, env, db_path):
+    port = free_port()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port),
+         "--workers", str(workers), "--no-access-log", "--log-level", "warning"],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL,
+    )
+    url = f"http://127.0.0.1:{port}"
+    try:
+        for _ in range(100):
+            try:
+                httpx.get(f"{url}/health")
+                break
+            except httpx.TransportError:
+                time.sleep(0.1)
+        deadline = time.time() + SECONDS
+        results = multiprocessing.Queue()
+        procs = [multiprocessing.Process(target=client_loop, args=(url, deadline, results)) for _ in range(CLIENTS)]
+        procs.append(multiprocessing.Process(target=writer_loop, args=(db_path, deadline)))
+        for proc in procs:
+            proc.start()
+        total = sum(results.get() for _ in range(CLIENTS))
+        for proc in procs:
+            proc.join()
+        return total / SECONDS
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "yapper.db"
+        env = dict(os.environ, DATABASE_URL=f"sqlite:///{db_path}", SEED_DB="1", LOG_LEVEL="WARNING")
+        # create and seed once, so every run starts from the same data
+        subprocess.run([sys.executable, "seed_db.py"], cwd=ROOT, env=env, check=True, stdout=subprocess.DEVNULL)
+
+        print(f"cores: {os.cpu_count()}")
+        baseline = None
+        for workers in WORKERS:
+            rps = bench(workers, env, db_path)
+            baseline = baseline or rps
+            print(f"{workers} worker(s): {rps:8.1f} req/s  ({rps / baseline:.2f}x)")
@@ -0,0 +1,94 @@
+import os
+import sqlite3
+import threading
+from collections import Counter, OrderedDict
+
+# Per-process cache for read endpoints that stays correct with several
+# workers. SQLite's PRAGMA data_version changes on a connection whenever
+# another connection commits, so each process keeps one idle watcher
+# connection per database and drops its cache once the version moves.
+# That covers commits from this process's pool and from other workers.
+
+CACHE_SIZE = int(os.getenv("READ_CACHE_SIZE", "1024"))
+
+
+class DataVersionWatcher:
+    def __init__(self, path, name, size=CACHE_SIZE):
+        # name labels the stats, the path is never exposed
+        self.name = name
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._version = None
+        self._size = size
+        self.stats = Counter()
+
+    def version(self):
+        with self._lock:
+            version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+            if version != self._version:
+                if self._entries:
+                    self.stats["invalidations"] += 1
+                self._entries.clear()
+                self._version = version
+            return version
+
+    def get(self, key, load):
+        # read the version first, so a commit racing the load only
+        # makes the stored entry look stale, never fresh
+        version = self.version()
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.stats["hits"] += 1
+                return self._entries[key]
+        value = load()
+        with self._lock:
+            self.stats["misses"] += 1
+            if version == self._version:
+                self._entries[key] = value
+                if len(self._entries) > self._size:
+                    self._entries.popitem(last=False)
+        return value
+
+    def snapshot(self):
+        # taken under the lock, request threads update both while serving
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self.stats["hits"],
+                "misses": self.stats["misses"],
+                "invalidations": self.stats["invalidations"],
+            }
+
+    def close(self):
+        self._conn.close()
+
+
+_watchers = {}
+_watchers_lock = threading.Lock()
+
+
+def _watcher_for(engine):
+    """Watcher for a file backed SQLite engine, None when caching can't be used"""
+    url = engine.url
+    if url.get_backend_name() != "sqlite" or url.database in (None, "", ":memory:"):
+        return None
+    with _watchers_lock:
+        if url.database not in _watchers:
+            name = "default" if not _watchers else f"database-{len(_watchers)}"
+            _watchers[url.database] = DataVersionWatcher(url.database, name)
+        return _watchers[url.database]
+
+
+def cached(session, key, load):
+    """Return load() for key, reusing the result until the database changes"""
+    watcher = _watcher_for(session.get_bind())
+    if watcher is None:
+        return load()
+    return watcher.get(key, load)
+
+
+def cache_stats():
+    with _watchers_lock:
+        return {watcher.name: watcher.snapshot() for watcher in _watchers.values()}
@@ -1,4 +1,6 @@
+from sqlalchemy import event
 from sqlmodel import SQLModel, create_engine, Session
+from transactions import enable_begin_immediate
 import os
 import dotenv
 
@@ -7,14 +9,54 @@ dotenv.load_dotenv()
 # SQLite database file
 DATABASE_URL = os.getenv("DATABASE_URL")
 
-# create engine
-engine = create_engine(DATABASE_URL, echo=True)
+
+def enable_wal(engine):
+    """Put a SQLite file in WAL mode, so readers such as backups never block writers"""
+    @event.listens_for(engine, "connect")
+    def _set_wal(dbapi_connection, connection_record):
+        dbapi_connection.execute("PRAGMA journal_mode=WAL")
+
+
+# seconds SQLite itself waits on a lock before reporting it, kept short so
+# run_write's backoff (not the driver's 5 s default) decides how long writes wait
+SQLITE_BUSY_TIMEOUT = float(os.getenv("SQLITE_BUSY_TIMEOUT", "0.1"))
+
+
+def create_db_engine(url):
+    """Engine with the app's SQLite settings, shared by the app, tools and tests"""
+    connect_args = {"timeout": SQLITE_BUSY_TIMEOUT} if url.startswith("sqlite") else {}
+    engine = create_engine(url, connect_args=connect_args)
+    if engine.dialect.name == "sqlite":
+        enable_begin_immediate(engine)
+        if engine.url.database not in (None, "", ":memory:"):
+            enable_wal(engine)
+    return engine
+
+
+# create engine, SQL logging goes through the app's log pipeline (SQL_ECHO=1)
+engine = create_db_engine(DATABASE_URL)
 
 # sessions factory
 def get_session():
     with Session(engine) as session:
         yield session
 
-# function to create the tables
-def init_db():
-    SQLModel.metadata.create_all(engine)
+# bump whenever the models change so init_db rebuilds missing tables
+SCHEMA_VERSION = 2
+
+# function to create the tables, returns True when the schema was (re)built.
+# on SQLite the version lives in PRAGMA user_version, so a boot against an
+# up to date database skips create_all's per-table checks
+def init_db(bind=None):
+    import models  # register every table before create_all, the version stamp makes misses stick
+    bind = bind or engine
+    if bind.dialect.name != "sqlite":
+        SQLModel.metadata.create_all(bind)
+        return True
+    # IMMEDIATE so workers booting together check and build the schema one at a time
+    with bind.connect().execution_options(sqlite_begin="IMMEDIATE") as conn, conn.begin():
+        if conn.exec_driver_sql("PRAGMA user_version").scalar() == SCHEMA_VERSION:
+            return False
+        SQLModel.metadata.create_all(conn)
+        conn.exec_driver_sql(f"PRAGMA user_version = {SCHEMA_VERSION}")
+    return True
@@ -0,0 +1,65 @@
+import hashlib
+import os
+from datetime import datetime, timedelta, timezone
+from fastapi import HTTPException
+from sqlalchemy import delete
+from sqlmodel import select
+from models import IdempotencyKey
+
+# how long a stored response can be replayed, in seconds
+IDEMPOTENCY_TTL = int(os.getenv("IDEMPOTENCY_TTL", str(24 * 60 * 60)))
+MAX_KEY_LENGTH = 255
+
+
+def request_hash(method, path, body):
+    """Short fingerprint of a request, so a key can't be reused for a different one"""
+    return hashlib.sha256(f"{method} {path}\n{body}".encode()).hexdigest()[:32]
+
+
+def _cutoff():
+    return datetime.now(timezone.utc) - timedelta(seconds=IDEMPOTENCY_TTL)
+
+
+def lookup(session, user_id, key, fingerprint):
+    """Stored entry for this user's key, or None if there isn't a live one"""
+    if len(key) > MAX_KEY_LENGTH:
+        raise HTTPException(status_code=400, detail="Idempotency-Key is too long")
+    stored = session.get(IdempotencyKey, (user_id, key))
+    if stored is None or stored.created_at.replace(tzinfo=timezone.utc) < _cutoff():
+        return None
+    if stored.request_hash != fingerprint:
+        raise HTTPException(
+            status_code=422,
+            detail="Idempotency-Key was already used for a different request"
+        )
+    return stored
+
+
+def save(session, user_id, key, fingerprint, response_json, status_code=200):
+    """Store a response in the caller's write transaction, replacing an expired entry"""
+    # expired keys are purged per user as new ones are written
+    session.exec(
+        delete(IdempotencyKey)
+        .where(IdempotencyKey.user_id == user_id)
+        .where(IdempotencyKey.created_at < _cutoff())
+    )
+    session.merge(IdempotencyKey(
+        user_id=user_id,
+        key=key,
+        request_hash=fingerprint,
+        status_code=status_code,
+        response=response_json,
+    ))
+
+
+def purge_expired(session):
+    """Delete every expired key, returns how many were removed"""
+    cutoff = _cutoff()
+    # read first (created_at is indexed) so a boot with nothing to purge never writes
+    expired = select(IdempotencyKey.user_id).where(IdempotencyKey.created_at < cutoff).limit(1)
+    if session.exec(expired).first() is None:
+        session.rollback()
+        return 0
+    result = session.exec(delete(IdempotencyKey).where(IdempotencyKey.created_at < cutoff))
+    session.commit()
+    return result.rowcount
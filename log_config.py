@@ -0,0 +1,179 @@
+import atexit
+import copy
+import json
+import logging
+import os
+import queue
+import random
+import sys
+import threading
+import time
+import uuid
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from fastapi import Request
+
+# correlation id for the request being handled, "-" outside of a request
+request_id_var: ContextVar[str] = ContextVar("request_id", default="-")
+
+access_logger = logging.getLogger("api.access")
+
+# attributes every LogRecord has, anything else was passed through extra=
+_RECORD_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "request_id"}
+
+
+class RequestIdFilter(logging.Filter):
+    """Stamp each record with the current request's correlation id"""
+
+    def filter(self, record):
+        record.request_id = request_id_var.get()
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """Render a record as one JSON object per line"""
+
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "request_id": getattr(record, "request_id", "-"),
+            "message": record.getMessage(),
+        }
+        entry.update(
+            (key, value) for key, value in vars(record).items()
+            if key not in _RECORD_ATTRS
+        )
+        # tracebacks are rendered to text before queueing, see DroppingQueueHandler.prepare
+        if record.exc_text:
+            entry["exc_info"] = record.exc_text
+        if record.stack_info:
+            entry["stack_info"] = record.stack_info
+        return json.dumps(entry, default=str)
+
+
+class DroppingQueueHandler(QueueHandler):
+    """Queue handler that drops records instead of blocking when the buffer is full"""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        # bumped from every request thread, so guarded like queries' counters
+        self._dropped_lock = threading.Lock()
+        self.dropped = 0
+
+    def prepare(self, record):
+        # the default prepare folds the traceback into the message, keep it
+        # in exc_text instead so the formatter can emit it as its own field
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.msg = record.message
+        record.args = None
+        record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self._dropped_lock:
+                self.dropped += 1
+
+
+def parse_sample_rates(value):
+    """Parse 'path_prefix=rate,...' into (prefix, rate) pairs, longest prefix first"""
+    rates = []
+    for item in (value or "").split(","):
+        prefix, sep, rate = item.partition("=")
+        if sep and prefix.strip():
+            rates.append((prefix.strip(), max(0.0, min(1.0, float(rate)))))
+    return sorted(rates, key=lambda pair: len(pair[0]), reverse=True)
+
+
+# access log sampling per path prefix, e.g. LOG_SAMPLE_RATES="/posts=0.1,/health=0"
+sample_rates = parse_sample_rates(os.getenv("LOG_SAMPLE_RATES"))
+
+
+def should_sample(path, status_code):
+    # errors are always logged
+    if status_code >= 500:
+        return True
+    for prefix, rate in sample_rates:
+        if path.startswith(prefix):
+            return rate >= 1.0 or random.random() < rate
+    return True
+
+
+_handler = None
+_listener = None
+
+
+def setup_logging():
+    """Route all logging through a bounded queue drained by a background writer thread"""
+    global _handler, _listener
+    if _listener is not None:
+        return _handler
+
+    stream = logging.StreamHandler(sys.stdout)
+    stream.setFormatter(JsonFormatter())
+
+    _handler = DroppingQueueHandler(queue.Queue(maxsize=int(os.getenv("LOG_QUEUE_SIZE", "10000"))))
+    # the filter runs on the request's thread, before the record is queued
+    _handler.addFilter(RequestIdFilter())
+
+    root = logging.getLogger()
+    root.setLevel(os.getenv("LOG_LEVEL", "INFO").upper())
+    root.addHandler(_handler)
+
+    # SQL statement logging, routed through the same queue
+    if os.getenv("SQL_ECHO", "").lower() in ("1", "true"):
+        logging.getLogger("sqlalchemy.engine").setLevel(logging.INFO)
+
+    _listener = QueueListener(_handler.queue, stream, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+    return _handler
+
+
+def shutdown_logging():
+    """Flush queued records and stop the writer thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def dropped_count():
+    """Records dropped because the log queue was full, reported by /health"""
+    if _handler is None:
+        return 0
+    with _handler._dropped_lock:
+        return _handler.dropped
+
+
+# access log middleware
+async def access_log(request: Request, call_next):
+    request_id = request.headers.get("X-Request-ID") or uuid.uuid4().hex
+    token = request_id_var.set(request_id)
+    start = time.perf_counter()
+    status_code = 500
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+        response.headers["X-Request-ID"] = request_id
+        return response
+    finally:
+        if should_sample(request.url.path, status_code):
+            access_logger.info(
+                "%s %s %s", request.method, request.url.path, status_code,
+                extra={
+                    "method": request.method,
+                    "path": request.url.path,
+                    "status": status_code,
+                    "duration_ms": round((time.perf_counter() - start) * 1000, 2),
+                },
+            )
+        request_id_var.reset(token)
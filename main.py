@@ -1,24 +1,25 @@
 from routes import router
 from fastapi import FastAPI, Depends, HTTPException, Request
 from fastapi.responses import RedirectResponse
-from authlib.integrations.starlette_client import OAuth
 from starlette.middleware.sessions import SessionMiddleware
-from starlette.config import Config
 from fastapi.middleware.cors import CORSMiddleware
 from urllib.parse import urlencode
 from database import init_db
-from sqlmodel import Session, select
-from database import get_session
+from sqlmodel import Session
+from database import get_session, engine
 from models import User, Post
+import queries
+from transactions import run_write, write_stats
+import cache
+import idempotency
+from starlette.concurrency import run_in_threadpool
 import os
 import json
 from dotenv import load_dotenv
 import logging
+from log_config import setup_logging, access_log, dropped_count
 
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+setup_logging()
 logger = logging.getLogger("api")
 
 load_dotenv()
@@ -43,32 +44,59 @@ app.add_middleware(
     allow_origins=origins,
     allow_credentials=True,
     allow_methods=["*"],
-    allow_headers=["*"]
+    allow_headers=["*"],
+    expose_headers=["X-Request-ID", "Idempotent-Replayed"]
 )
 
-# db initialize
+# structured access log with per-request correlation ids
+app.middleware("http")(access_log)
+
+# db initialize, schema is only (re)built when its version is behind
 @app.on_event("startup")
 async def on_startup():
-    init_db()
+    if init_db() and os.getenv("SEED_DB") == "1":
+        # fresh database, seed it in this process instead of a separate one
+        from seed_db import seed_db
+        seed_db()
+    # drop idempotency keys that outlived their TTL while the app was down
+    with Session(engine) as session:
+        idempotency.purge_expired(session)
     logger.info("Application startup complete")
     logger.info("Login page available at: http://127.0.0.1:8000/login")
     logger.info("Posts page available at: http://127.0.0.1:8000/posts")
 
 
-# Oauth config
-config = Config('.env')
-oauth = OAuth(config)
-oauth.register(
-    name='auth0',
-    client_id=os.getenv("AUTH0_CLIENT_ID"),
-    client_secret=os.getenv("AUTH0_CLIENT_SECRET"),
-    client_kwargs={
-        'scope': 'openid profile email'
-    },
-    server_metadata_url=f"https://{os.getenv('AUTH0_DOMAIN')}/.well-known/openid-configuration",
-    authorize_url=f"https://{os.getenv('AUTH0_DOMAIN')}/authorize",
-    token_url=f"https://{os.getenv('AUTH0_DOMAIN')}/oauth/token",
-)
+# Oauth config, Authlib is only imported once an auth route needs it
+_oauth = None
+
+def get_oauth():
+    global _oauth
+    if _oauth is None:
+        from authlib.integrations.starlette_client import OAuth
+        from starlette.config import Config
+
+        config = Config('.env')
+        oauth = OAuth(config)
+        oauth.register(
+            name='auth0',
+            client_id=os.getenv("AUTH0_CLIENT_ID"),
+            client_secret=os.getenv("AUTH0_CLIENT_SECRET"),
+            client_kwargs={
+                'scope': 'openid profile email'
+            },
+            server_metadata_url=f"https://{os.getenv('AUTH0_DOMAIN')}/.well-known/openid-configuration",
+            authorize_url=f"https://{os.getenv('AUTH0_DOMAIN')}/authorize",
+            token_url=f"https://{os.getenv('AUTH0_DOMAIN')}/oauth/token",
+        )
+        _oauth = oauth
+    return _oauth
+
+
+# keep main.oauth working for callers that expect the module attribute
+def __getattr__(name):
+    if name == "oauth":
+        return get_oauth()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # auth0 variables
 AUTH0_DOMAIN = os.getenv("AUTH0_DOMAIN")
@@ -85,12 +113,12 @@ admin_emails = {e.strip().lower() for e in os.getenv("ADMIN_EMAILS", "").split("
 async def login(request: Request):
     # Use full callback URL instead of request.url_for
     callback_url = os.getenv("AUTH0_CALLBACK_URL", "http://127.0.0.1:8000/callback")
-    return await oauth.auth0.authorize_redirect(request, callback_url)
+    return await get_oauth().auth0.authorize_redirect(request, callback_url)
 
 # auth callback
 @app.get('/callback')
 async def callback(request: Request, db: Session = Depends(get_session)):
-    token = await oauth.auth0.authorize_access_token(request)
+    token = await get_oauth().auth0.authorize_access_token(request)
 
     user_info = token.get("userinfo") or {}
     email = user_info.get("email")
@@ -98,22 +126,24 @@ async def callback(request: Request, db: Session = Depends(get_session)):
         raise HTTPException(
             status_code=400, detail="Email not found in user info")
 
-    # add email into user table
-    existing = db.exec(select(User).where(User.email == email)).first()
-    if not existing:
-        user = User(email=email)
-    else:
-        user = existing
+    def write():
+        # add email into user table
+        existing = db.exec(queries.user_by_email, params={"email": email}).first()
+        if not existing:
+            user = User(email=email)
+        else:
+            user = existing
 
-    # check if user is admin
-    if email.lower() in admin_emails:
-        user.is_admin = True
+        # check if user is admin
+        if email.lower() in admin_emails:
+            user.is_admin = True
 
-    db.add(user)
-    db.commit()
-    db.refresh(user)
+        db.add(user)
+        db.flush()
+        return {"id": user.id, "email": user.email, "is_admin": user.is_admin}
 
-    request.session["user"] = {"id": user.id, "email": user.email, "is_admin": user.is_admin}
+    # retries sleep between attempts, so keep them off the event loop
+    request.session["user"] = await run_in_threadpool(run_write, db, write)
     # change if want redirect different after login
     return RedirectResponse(url='https://team-yapper-front-end.onrender.com/')
 
@@ -133,6 +163,21 @@ async def logout(request: Request):
 # health check
 @app.get("/health")
 async def health_check():
-    return {"status": "ok"}
+    return {"status": "ok", "dropped_logs": dropped_count()}
+
+# prepared query cache stats
+@app.get("/health/queries")
+async def query_cache_stats():
+    return queries.cache_stats()
+
+# write transaction retry stats
+@app.get("/health/writes")
+async def write_transaction_stats():
+    return write_stats()
+
+# read cache stats, all stats endpoints report the worker that serves them
+@app.get("/health/cache")
+async def read_cache_stats():
+    return cache.cache_stats()
 
 app.include_router(router)
@@ -17,3 +17,13 @@ class Post(SQLModel, table=True):
     user: Optional[User] = Relationship(back_populates="posts")
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
     updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+
+
+# stored responses for Idempotency-Key retries, one row per user and key
+class IdempotencyKey(SQLModel, table=True):
+    user_id: int = Field(foreign_key="user.id", primary_key=True)
+    key: str = Field(primary_key=True, max_length=255)
+    request_hash: str
+    status_code: int
+    response: str
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc), index=True)
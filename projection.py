@@ -0,0 +1,62 @@
+from typing import Dict, Optional, Sequence, Tuple
+from fastapi import HTTPException
+from sqlalchemy import select
+from models import Post, User
+
+# columns loaded for each projectable field, keyed per endpoint.
+# fields backed by User columns pull in an outer join on post.user_id
+POST_LIST_COLUMNS = {
+    "id": (Post.id,),
+    "content": (Post.content,),
+    "user_id": (Post.user_id,),
+    "user_email": (User.email.label("user_email"),),
+    "created_at": (Post.created_at,),
+}
+
+POST_DETAIL_COLUMNS = {
+    "id": (Post.id,),
+    "content": (Post.content,),
+    "created_at": (Post.created_at,),
+    "user": (User.id.label("author_id"), User.email.label("author_email")),
+}
+
+POST_INFO_COLUMNS = {
+    "id": (Post.id,),
+    "content": (Post.content,),
+    "user_id": (Post.user_id,),
+    "created_at": (Post.created_at,),
+    "user": (User.email.label("author_email"),),
+}
+
+USER_POST_COLUMNS = {
+    "id": (Post.id,),
+    "content": (Post.content,),
+    "created_at": (Post.created_at,),
+}
+
+USER_FIELDS = {"user", "user_email"}
+
+
+def parse_fields(fields: Optional[str], columns: Dict[str, Sequence]) -> Tuple[str, ...]:
+    """Resolve a comma separated ?fields= value, defaulting to every field"""
+    if fields is None:
+        return tuple(columns)
+    requested = {name.strip() for name in fields.split(",") if name.strip()}
+    unknown = requested - columns.keys()
+    if not requested or unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid fields, choose from: {', '.join(columns)}"
+        )
+    # keep the declared order so responses are stable
+    return tuple(name for name in columns if name in requested)
+
+
+def select_post_fields(selected: Sequence[str], columns: Dict[str, Sequence]):
+    """Build a SELECT over only the columns backing the selected fields"""
+    statement = select(
+        *[column for name in selected for column in columns[name]]
+    ).select_from(Post)
+    if USER_FIELDS.intersection(selected):
+        statement = statement.outerjoin(User, User.id == Post.user_id)
+    return statement
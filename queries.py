@@ -0,0 +1,92 @@
+import threading
+from collections import Counter
+from functools import lru_cache
+from typing import Tuple
+from sqlalchemy import bindparam, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.engine.interfaces import CacheStats
+from sqlmodel import select
+from models import Post, User
+from projection import (
+    POST_LIST_COLUMNS, POST_DETAIL_COLUMNS, POST_INFO_COLUMNS, USER_POST_COLUMNS,
+    select_post_fields
+)
+
+# Prepared statements for the hot route queries. Each one is built once at
+# import (or once per ?fields= combination) with bound parameters, so a request
+# skips constructing the select and SQLAlchemy reuses its compiled form.
+# Statements are tagged with a query_name so compiled cache hits can be counted.
+
+user_by_email = select(User).where(
+    User.email == bindparam("email")
+).execution_options(query_name="user_by_email")
+
+
+@lru_cache(maxsize=None)
+def post_list(selected: Tuple[str, ...]):
+    return select_post_fields(selected, POST_LIST_COLUMNS).order_by(
+        Post.created_at.desc()
+    ).execution_options(query_name="post_list")
+
+
+@lru_cache(maxsize=None)
+def post_detail(selected: Tuple[str, ...]):
+    return select_post_fields(selected, POST_DETAIL_COLUMNS).where(
+        Post.id == bindparam("post_id")
+    ).execution_options(query_name="post_detail")
+
+
+@lru_cache(maxsize=None)
+def post_info(selected: Tuple[str, ...]):
+    return select_post_fields(selected, POST_INFO_COLUMNS).where(
+        Post.id == bindparam("post_id")
+    ).execution_options(query_name="post_info")
+
+
+@lru_cache(maxsize=None)
+def user_posts(selected: Tuple[str, ...]):
+    return select_post_fields(selected, USER_POST_COLUMNS).where(
+        Post.user_id == bindparam("user_id")
+    ).execution_options(query_name="user_posts")
+
+
+STATEMENT_BUILDERS = (post_list, post_detail, post_info, user_posts)
+
+# compiled cache hits/misses per query_name, across every engine.
+# updated from threadpool threads, so guarded like transactions' counters
+_compiled_stats = {}
+_stats_lock = threading.Lock()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _record_cache_hit(conn, cursor, statement, parameters, context, executemany):
+    name = context.execution_options.get("query_name")
+    if name is None:
+        return
+    outcome = "hits" if context.cache_hit is CacheStats.CACHE_HIT else "misses"
+    with _stats_lock:
+        _compiled_stats.setdefault(name, Counter())[outcome] += 1
+
+
+def cache_stats():
+    """Statement builder and compiled cache counters for the prepared queries"""
+    return {
+        "statements": {
+            builder.__name__: builder.cache_info()._asdict()
+            for builder in STATEMENT_BUILDERS
+        },
+        "compiled": _compiled_snapshot(),
+    }
+
+
+def _compiled_snapshot():
+    with _stats_lock:
+        return {
+            name: {"hits": counts["hits"], "misses": counts["misses"]}
+            for name, counts in _compiled_stats.items()
+        }
+
+
+def reset_cache_stats():
+    with _stats_lock:
+        _compiled_stats.clear()
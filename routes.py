@@ -1,11 +1,15 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Request
-from sqlmodel import Session, select
-from sqlalchemy.orm import selectinload
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Header, Response
+from sqlmodel import Session
+from typing import List, Optional
 from database import get_session
 from models import Post, User
 from pydantic import BaseModel
-from schemas import PostRead
+from schemas import PostRead, PostDetail, PostAuthor, PostInfo, PostInfoAuthor, UserPost, UserPosts, PostPublic
+from projection import POST_LIST_COLUMNS, POST_DETAIL_COLUMNS, POST_INFO_COLUMNS, USER_POST_COLUMNS, parse_fields
+import queries
+from transactions import run_write
+from cache import cached
+import idempotency
 from datetime import datetime
 
 router = APIRouter()
@@ -47,23 +51,23 @@ def get_user(user: dict = Depends(require_login)):
 #             detail=f"An error occurred while fetching posts: {str(e)}"
 #         )
 
-@router.get("/posts", response_model=List[PostRead])
-def get_all_posts(session: Session = Depends(get_session)):
+@router.get("/posts", response_model=List[PostRead], response_model_exclude_unset=True)
+def get_all_posts(fields: Optional[str] = None, session: Session = Depends(get_session)):
+    selected = parse_fields(fields, POST_LIST_COLUMNS)
     try:
-        statement = select(Post).options(selectinload(Post.user)).order_by(Post.created_at.desc())
-        posts = session.exec(statement).all()
-
-        # Map posts to PostRead schema including user's email and formatted created_at
-        return [
-            PostRead(
-                id=post.id,
-                content=post.content,
-                user_id=post.user_id,
-                user_email=post.user.email if post.user else None,
-                created_at=format_datetime(post.created_at)
-            )
-            for post in posts
-        ]
+        def load():
+            rows = session.exec(queries.post_list(selected)).mappings().all()
+
+            # Map rows to PostRead schema, only setting the requested fields
+            return [
+                PostRead(**{
+                    name: format_datetime(row[name]) if name == "created_at" else row[name]
+                    for name in selected
+                })
+                for row in rows
+            ]
+
+        return cached(session, ("post_list", selected), load)
 
     except Exception:
         # Generic error message is safer for production
@@ -73,100 +77,163 @@ def get_all_posts(session: Session = Depends(get_session)):
         )
 
 # Create a new post
-@router.post("/posts")
-def create_post(post: PostCreate, user: dict = Depends(require_login), session: Session = Depends(get_session)):
-    # Grab the user from DB
-    db_user = session.exec(select(User).where(
-        User.email == user["email"])).first()
-    if not db_user:
-        raise HTTPException(status_code=404, detail="User not found")
-
-    # Create new Post
-    new_post = Post(content=post.content, user_id=db_user.id)
-    session.add(new_post)
-    session.commit()
-    session.refresh(new_post)
-    return new_post
+@router.post("/posts", response_model=PostPublic)
+def create_post(post: PostCreate,
+                response: Response,
+                idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+                user: dict = Depends(require_login),
+                session: Session = Depends(get_session)):
+    fingerprint = idempotency.request_hash("POST", "/posts", post.model_dump_json())
+
+    def write():
+        # Grab the user from DB
+        db_user = session.exec(queries.user_by_email, params={"email": user["email"]}).first()
+        if not db_user:
+            raise HTTPException(status_code=404, detail="User not found")
+
+        # a retried request gets the stored response, no new post
+        if idempotency_key:
+            stored = idempotency.lookup(session, db_user.id, idempotency_key, fingerprint)
+            if stored is not None:
+                response.headers["Idempotent-Replayed"] = "true"
+                response.status_code = stored.status_code
+                return PostPublic.model_validate_json(stored.response)
+
+        # Create new Post, flushed and read back so the response is built
+        # before commit with the same timestamps the database returns
+        new_post = Post(content=post.content, user_id=db_user.id)
+        session.add(new_post)
+        session.flush()
+        session.refresh(new_post)
+        result = PostPublic.model_validate(new_post)
+        if idempotency_key:
+            idempotency.save(session, db_user.id, idempotency_key, fingerprint, result.model_dump_json())
+        return result
+
+    return run_write(session, write)
 
 # Get content of a specific post
-@router.get("/posts/{post_id}")
-def read_post(post_id: int, session: Session = Depends(get_session)):
-    post = session.get(Post, post_id)
-    if not post:
-        raise HTTPException(status_code=404, detail="Post not found")
-    return {
-        "id": post.id,
-        "content": post.content,
-        "created_at": format_datetime(post.created_at),
-        "user": {
-            "id": post.user.id,
-            "email": post.user.email
-        } if post.user else None
-    }
+@router.get("/posts/{post_id}", response_model=PostDetail, response_model_exclude_unset=True)
+def read_post(post_id: int, fields: Optional[str] = None, session: Session = Depends(get_session)):
+    selected = parse_fields(fields, POST_DETAIL_COLUMNS)
+
+    def load():
+        row = session.exec(queries.post_detail(selected), params={"post_id": post_id}).mappings().first()
+        if not row:
+            raise HTTPException(status_code=404, detail="Post not found")
+        post = PostDetail()
+        if "id" in selected:
+            post.id = row["id"]
+        if "content" in selected:
+            post.content = row["content"]
+        if "created_at" in selected:
+            post.created_at = format_datetime(row["created_at"])
+        if "user" in selected:
+            post.user = PostAuthor(
+                id=row["author_id"],
+                email=row["author_email"]
+            ) if row["author_id"] is not None else None
+        return post
+
+    return cached(session, ("post_detail", post_id, selected), load)
 
 # Get detailed info about a specific post
-@router.get("/posts/{post_id}/info")
-def read_post_info(post_id: int, session: Session = Depends(get_session)):
-    post = session.get(Post, post_id)
-    if not post:
-        raise HTTPException(status_code=404, detail="Post not found")
-    return {
-        "id": post.id,
-        "content": post.content,
-        "user_id": post.user_id,
-        "created_at": format_datetime(post.created_at),
-        "user": {
-            "email": post.user.email
-        } if post.user else None
-    }
+@router.get("/posts/{post_id}/info", response_model=PostInfo, response_model_exclude_unset=True)
+def read_post_info(post_id: int, fields: Optional[str] = None, session: Session = Depends(get_session)):
+    selected = parse_fields(fields, POST_INFO_COLUMNS)
+
+    def load():
+        row = session.exec(queries.post_info(selected), params={"post_id": post_id}).mappings().first()
+        if not row:
+            raise HTTPException(status_code=404, detail="Post not found")
+        post = PostInfo()
+        if "id" in selected:
+            post.id = row["id"]
+        if "content" in selected:
+            post.content = row["content"]
+        if "user_id" in selected:
+            post.user_id = row["user_id"]
+        if "created_at" in selected:
+            post.created_at = format_datetime(row["created_at"])
+        if "user" in selected:
+            post.user = PostInfoAuthor(
+                email=row["author_email"]
+            ) if row["author_email"] is not None else None
+        return post
+
+    return cached(session, ("post_info", post_id, selected), load)
 
  # Get all posts for a specific user
-@router.get("/user/{user_id}/posts")
-def get_user_posts(user_id: int, session: Session = Depends(get_session)):
-    # checks if the user exists
-    user = session.get(User, user_id)
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    # User exists → get posts
-    posts = session.exec(select(Post).where(Post.user_id == user_id)).all()
-    # Format the posts (empty list is fine)
-    filtered_posts = [
-        {"id": post.id, "content": post.content, "created_at": format_datetime(post.created_at)} 
-        for post in posts
-    ]
-    return {
-        "email": user.email,
-        "posts": filtered_posts,  # Will be [] when user has no posts
-    }
+@router.get("/user/{user_id}/posts", response_model=UserPosts, response_model_exclude_unset=True)
+def get_user_posts(user_id: int, fields: Optional[str] = None, session: Session = Depends(get_session)):
+    selected = parse_fields(fields, USER_POST_COLUMNS)
+
+    def load():
+        # checks if the user exists
+        user = session.get(User, user_id)
+        if not user:
+            raise HTTPException(status_code=404, detail="User not found")
+        # User exists → get only the requested post columns
+        rows = session.exec(queries.user_posts(selected), params={"user_id": user_id}).mappings().all()
+        # Format the posts (empty list is fine)
+        filtered_posts = [
+            UserPost(**{
+                name: format_datetime(row[name]) if name == "created_at" else row[name]
+                for name in selected
+            })
+            for row in rows
+        ]
+        return UserPosts(
+            email=user.email,
+            posts=filtered_posts,  # Will be [] when user has no posts
+        )
+
+    return cached(session, ("user_posts", user_id, selected), load)
 
 
 # UPDATE post route
-@router.patch('/posts/{post_id}')
+@router.patch('/posts/{post_id}', response_model=PostPublic)
 def update_post(post_id: int,
                 post: PostCreate,
+                response: Response,
+                idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
                 user: dict = Depends(require_login),
                 session: Session = Depends(get_session)):
+    fingerprint = idempotency.request_hash("PATCH", f"/posts/{post_id}", post.model_dump_json())
+
+    def write():
+        # get the logged in user, checked against the post's owner below
+        db_user = session.exec(queries.user_by_email, params={"email": user["email"]}).first()
 
-    # get post from db
-    db_post = session.get(Post, post_id)
+        # a retried request gets the stored response without redoing the update
+        if idempotency_key and db_user:
+            stored = idempotency.lookup(session, db_user.id, idempotency_key, fingerprint)
+            if stored is not None:
+                response.headers["Idempotent-Replayed"] = "true"
+                response.status_code = stored.status_code
+                return PostPublic.model_validate_json(stored.response)
 
-    if not db_post:
-        raise HTTPException(status_code=404, detail="Post not found")
+        # get post from db
+        db_post = session.get(Post, post_id)
 
-    # ensure the logged in user is the owner of the post
-    db_user = session.exec(select(User).where(
-        User.email == user["email"])).first()
+        if not db_post:
+            raise HTTPException(status_code=404, detail="Post not found")
 
-    # also checks if a user is an admin
-    if db_post.user_id != db_user.id and not db_user.is_admin:
-        raise HTTPException(status_code=403, detail="Forbidden")
+        # also checks if a user is an admin
+        if db_post.user_id != db_user.id and not db_user.is_admin:
+            raise HTTPException(status_code=403, detail="Forbidden")
 
-    # update post content
-    db_post.content = post.content
-    session.add(db_post)
-    session.commit()
-    session.refresh(db_post)
-    return db_post
+        # update post content
+        db_post.content = post.content
+        session.add(db_post)
+        session.flush()
+        session.refresh(db_post)
+        result = PostPublic.model_validate(db_post)
+        if idempotency_key:
+            idempotency.save(session, db_user.id, idempotency_key, fingerprint, result.model_dump_json())
+        return result
+
+    return run_write(session, write)
 
 
 # DELETE post route
@@ -175,21 +242,22 @@ def delete_post(post_id: int,
                 user: dict = Depends(require_login),
                 session: Session = Depends(get_session)):
 
-    # get post from db
-    db_post = session.get(Post, post_id)
+    def write():
+        # get post from db
+        db_post = session.get(Post, post_id)
+
+        if not db_post:
+            raise HTTPException(status_code=404, detail="Post not found")
 
-    if not db_post:
-        raise HTTPException(status_code=404, detail="Post not found")
+        # ensure the logged in user is the owner of the post
+        db_user = session.exec(queries.user_by_email, params={"email": user["email"]}).first()
 
-    # ensure the logged in user is the owner of the post
-    db_user = session.exec(select(User).where(
-        User.email == user["email"])).first()
+        # also checks if a user is an admin
+        if db_post.user_id != db_user.id and not db_user.is_admin:
+            raise HTTPException(status_code=403, detail="Forbidden")
 
-    # also checks if a user is an admin
-    if db_post.user_id != db_user.id and not db_user.is_admin:
-        raise HTTPException(status_code=403, detail="Forbidden")
+        # delete post
+        session.delete(db_post)
 
-    # delete post
-    session.delete(db_post)
-    session.commit()
+    run_write(session, write)
     return {"message": "Post deleted successfully"}
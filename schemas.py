@@ -1,9 +1,56 @@
-from typing import Optional
+from typing import Optional, List
+from datetime import datetime
 from sqlmodel import SQLModel
 
+# fields on the read models are optional so that ?fields= projections
+# can leave them unset; routes serialize with response_model_exclude_unset
 class PostRead(SQLModel):
+    id: Optional[int] = None
+    content: Optional[str] = None
+    user_id: Optional[int] = None
+    user_email: Optional[str] = None  # include the email
+    created_at: Optional[str] = None
+
+
+class PostAuthor(SQLModel):
+    id: int
+    email: str
+
+
+class PostDetail(SQLModel):
+    id: Optional[int] = None
+    content: Optional[str] = None
+    created_at: Optional[str] = None
+    user: Optional[PostAuthor] = None
+
+
+class PostInfoAuthor(SQLModel):
+    email: str
+
+
+class PostInfo(SQLModel):
+    id: Optional[int] = None
+    content: Optional[str] = None
+    user_id: Optional[int] = None
+    created_at: Optional[str] = None
+    user: Optional[PostInfoAuthor] = None
+
+
+class UserPost(SQLModel):
+    id: Optional[int] = None
+    content: Optional[str] = None
+    created_at: Optional[str] = None
+
+
+class UserPosts(SQLModel):
+    email: str
+    posts: List[UserPost]
+
+
+# returned by create and update
+class PostPublic(SQLModel):
     id: int
     content: str
     user_id: int
-    user_email: Optional[str]  # include the email
-    created_at: str
\ No newline at end of file
+    created_at: datetime
+    updated_at: datetime
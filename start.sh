@@ -5,13 +5,21 @@ DB_FILE="/app/data/yapper.db"
 # Ensure data dir exists (volume mount will persist)
 mkdir -p /app/data
 
+# Schema init (and seeding a fresh database) runs inside the server process on startup
 if [ ! -f "$DB_FILE" ]; then
-    echo "🔧 Database file not found — initializing and seeding..."
-    python -c "from database import init_db; init_db()"
-    python seed_db.py
+    echo "🔧 Database file not found — will initialize and seed on startup..."
+    export SEED_DB=1
 else
-    echo "✅ Database file exists, skipping init/seed"
+    echo "✅ Database file exists, schema is checked by version on startup"
 fi
 
-# Start the application
-uvicorn main:app --host 0.0.0.0 --port 8000 --log-level info
\ No newline at end of file
+# Periodic online snapshots when a backup dir is configured.
+# Only /app/data persists across deploys, so point BACKUP_DIR at /app/data/backups
+if [ -n "$BACKUP_DIR" ]; then
+    echo "📦 Taking periodic backups into $BACKUP_DIR"
+    python backup.py periodic &
+fi
+
+# Start the application, WEB_CONCURRENCY sets the number of worker processes.
+# Workers share the SQLite file and drop their read caches when another commits
+uvicorn main:app --host 0.0.0.0 --port 8000 --log-level info --no-access-log --workers "${WEB_CONCURRENCY:-1}"
\ No newline at end of file
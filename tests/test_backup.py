@@ -0,0 +1,168 @@
+import sqlite3
+import statistics
+import threading
+import time
+
+import pytest
+from sqlmodel import Session, SQLModel
+
+import backup
+from backup import create_snapshot, list_snapshots, prune_snapshots, restore_snapshot
+from database import create_db_engine
+from models import Post, User
+
+
+def make_database(path, posts=2000):
+    # same engine setup as the app, so the file is in WAL mode
+    engine = create_db_engine(f"sqlite:///{path}")
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        user = User(email="writer@example.com")
+        session.add(user)
+        session.commit()
+        session.refresh(user)
+        session.add_all([Post(content="x" * 500, user_id=user.id) for _ in range(posts)])
+        session.commit()
+        return engine, user.id
+
+
+def count_posts(path):
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute("SELECT count(*) FROM post").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def write_latencies(engine, user_id, stop):
+    # time each create_post style write until told to stop
+    latencies = []
+    while not stop.is_set():
+        start = time.perf_counter()
+        with Session(engine) as session:
+            session.add(Post(content="concurrent write", user_id=user_id))
+            session.commit()
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def run_writer(engine, user_id, seconds, during=None):
+    stop = threading.Event()
+    result = {}
+    writer = threading.Thread(target=lambda: result.update(latencies=write_latencies(engine, user_id, stop)))
+    writer.start()
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        if during:
+            during()
+        else:
+            time.sleep(0.01)
+    stop.set()
+    writer.join()
+    return result["latencies"]
+
+
+def p95(latencies):
+    return statistics.quantiles(latencies, n=20)[-1]
+
+
+# Test snapshots taken under concurrent writes are consistent and barely slow writers down
+def test_snapshot_under_write_load(tmp_path):
+    db_path = tmp_path / "yapper.db"
+    backup_dir = tmp_path / "backups"
+    engine, user_id = make_database(db_path)
+
+    baseline = run_writer(engine, user_id, 0.5)
+    during = run_writer(
+        engine, user_id, 0.5,
+        during=lambda: create_snapshot(backup_dir, source_path=db_path, keep=3),
+    )
+    engine.dispose()
+
+    added = p95(during) - p95(baseline)
+    print(f"\nwrite p95 baseline {p95(baseline) * 1000:.2f}ms, "
+          f"during backup {p95(during) * 1000:.2f}ms, added {added * 1000:.2f}ms")
+
+    snapshots = list_snapshots(backup_dir)
+    assert 1 <= len(snapshots) <= 3
+    conn = sqlite3.connect(snapshots[-1])
+    assert conn.execute("PRAGMA integrity_check").fetchone()[0] == "ok"
+    conn.close()
+    assert count_posts(snapshots[-1]) >= 2000
+    # writers should never wait long on the backup's read lock
+    assert added < 0.25
+
+
+# Test the single step fallback, forced on a larger database, doesn't stall writers
+def test_snapshot_restart_fallback_under_write_load(tmp_path, monkeypatch, caplog):
+    db_path = tmp_path / "yapper.db"
+    backup_dir = tmp_path / "backups"
+    engine, user_id = make_database(db_path, posts=30000)
+    # small steps and no restarts allowed, so any concurrent commit forces the fallback
+    monkeypatch.setattr(backup, "PAGES_PER_STEP", 8)
+    monkeypatch.setattr(backup, "MAX_RESTARTS", 0)
+
+    baseline = run_writer(engine, user_id, 0.5)
+    with caplog.at_level("WARNING", logger="api.backup"):
+        during = run_writer(
+            engine, user_id, 1.0,
+            during=lambda: create_snapshot(backup_dir, source_path=db_path, keep=2),
+        )
+    engine.dispose()
+
+    fallbacks = [r for r in caplog.records if "copying in one step" in r.getMessage()]
+    print(f"\nfallbacks {len(fallbacks)}, write p95 baseline {p95(baseline) * 1000:.2f}ms, "
+          f"during backup {p95(during) * 1000:.2f}ms")
+
+    assert fallbacks
+    snapshot = list_snapshots(backup_dir)[-1]
+    assert count_posts(snapshot) >= 30000
+    # in WAL mode the whole-database read doesn't hold writers back
+    assert p95(during) - p95(baseline) < 0.02
+
+
+# Test retention keeps only the newest snapshots
+def test_prune_snapshots(tmp_path):
+    for stamp in ("20250101", "20250102", "20250103"):
+        (tmp_path / f"yapper-{stamp}T000000000000Z.db").touch()
+
+    removed = prune_snapshots(tmp_path, keep=2)
+
+    assert [p.name for p in removed] == ["yapper-20250101T000000000000Z.db"]
+    assert len(list_snapshots(tmp_path)) == 2
+
+
+# Test retention refuses to delete every snapshot
+def test_keep_must_be_positive(tmp_path):
+    with pytest.raises(ValueError):
+        prune_snapshots(tmp_path, keep=0)
+    with pytest.raises(ValueError):
+        create_snapshot(tmp_path / "backups", source_path=tmp_path / "yapper.db", keep=0)
+    assert not (tmp_path / "backups").exists()
+
+
+# Test a missing database is reported instead of snapshotted as an empty one
+def test_snapshot_missing_source(tmp_path):
+    db_path = tmp_path / "missing.db"
+
+    with pytest.raises(FileNotFoundError):
+        create_snapshot(tmp_path / "backups", source_path=db_path)
+
+    assert not db_path.exists()
+    assert list_snapshots(tmp_path / "backups") == []
+
+
+# Test restoring a snapshot replaces the database contents
+def test_restore_snapshot(tmp_path):
+    db_path = tmp_path / "yapper.db"
+    engine, user_id = make_database(db_path, posts=10)
+    snapshot = create_snapshot(tmp_path / "backups", source_path=db_path)
+
+    with Session(engine) as session:
+        session.add(Post(content="after snapshot", user_id=user_id))
+        session.commit()
+    engine.dispose()
+    assert count_posts(db_path) == 11
+
+    restore_snapshot(snapshot, db_path)
+    assert count_posts(db_path) == 10
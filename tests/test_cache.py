@@ -0,0 +1,65 @@
+from sqlmodel import Session, SQLModel, create_engine, select
+
+from cache import cached, cache_stats, _watcher_for
+from models import User
+
+
+def count_users(session):
+    return len(session.exec(select(User)).all())
+
+
+# Test cached reads are reused until another connection commits
+def test_cache_invalidated_by_other_connection(tmp_path):
+    path = tmp_path / "yapper.db"
+    # two engines stand in for two worker processes sharing the file
+    worker_a = create_engine(f"sqlite:///{path}")
+    worker_b = create_engine(f"sqlite:///{path}")
+    SQLModel.metadata.create_all(worker_a)
+    watcher = _watcher_for(worker_a)
+    loads = []
+
+    def read():
+        with Session(worker_a) as session:
+            return cached(session, "users", lambda: loads.append(1) or count_users(session))
+
+    assert read() == 0
+    assert read() == 0
+    assert len(loads) == 1
+
+    with Session(worker_b) as session:
+        session.add(User(email="other@example.com"))
+        session.commit()
+
+    assert read() == 1
+    assert len(loads) == 2
+    assert watcher.stats["invalidations"] == 1
+
+    # commits from this worker's own pool invalidate too
+    with Session(worker_a) as session:
+        session.add(User(email="self@example.com"))
+        session.commit()
+
+    assert read() == 2
+    worker_a.dispose()
+    worker_b.dispose()
+
+
+# Test in-memory databases bypass the cache
+def test_cache_skips_memory_database(session):
+    loads = []
+    cached(session, "users", lambda: loads.append(1))
+    cached(session, "users", lambda: loads.append(1))
+    assert len(loads) == 2
+
+
+# Test cache stats don't reveal database paths
+def test_cache_stats_hide_paths(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'yapper.db'}")
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        cached(session, "users", lambda: count_users(session))
+
+    stats = cache_stats()
+    assert stats
+    assert not any(str(tmp_path) in name for name in stats)
+    engine.dispose()
@@ -0,0 +1,18 @@
+from sqlmodel import SQLModel, create_engine
+from sqlalchemy import inspect
+
+import database
+from database import init_db
+
+
+# Test the schema is only built when its version is behind
+def test_init_db_skips_current_schema(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'yapper.db'}")
+
+    assert init_db(engine) is True
+    assert "post" in inspect(engine).get_table_names()
+    assert init_db(engine) is False
+
+    monkeypatch.setattr(database, "SCHEMA_VERSION", database.SCHEMA_VERSION + 1)
+    assert init_db(engine) is True
+    engine.dispose()
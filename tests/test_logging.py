@@ -0,0 +1,80 @@
+import json
+import logging
+import queue
+import threading
+
+from log_config import DroppingQueueHandler, JsonFormatter, parse_sample_rates, should_sample
+import log_config
+
+# Test the queue handler drops records instead of blocking when full
+def test_dropping_queue_handler_drops_when_full():
+    handler = DroppingQueueHandler(queue.Queue(maxsize=2))
+    logger = logging.getLogger("test.dropping")
+    logger.propagate = False
+    logger.addHandler(handler)
+    try:
+        for i in range(5):
+            logger.warning("line %s", i)
+    finally:
+        logger.removeHandler(handler)
+
+    assert handler.queue.qsize() == 2
+    assert handler.dropped == 3
+
+# Test drops from many threads at once are all counted
+def test_dropping_queue_handler_counts_concurrent_drops():
+    handler = DroppingQueueHandler(queue.Queue(maxsize=1))
+    record = logging.makeLogRecord({"msg": "line"})
+
+    def flood():
+        for _ in range(2000):
+            handler.enqueue(record)
+
+    threads = [threading.Thread(target=flood) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert handler.dropped == 8 * 2000 - 1
+
+# Test request ids are echoed back or generated
+def test_request_id_header(client):
+    response = client.get("/health", headers={"X-Request-ID": "abc123"})
+    assert response.headers["X-Request-ID"] == "abc123"
+
+    response = client.get("/health")
+    assert len(response.headers["X-Request-ID"]) == 32
+
+# Test per-route sampling, errors are never sampled out
+def test_access_log_sampling(monkeypatch):
+    monkeypatch.setattr(log_config, "sample_rates", parse_sample_rates("/posts=0,/posts/1=1"))
+
+    assert should_sample("/posts", 200) is False
+    assert should_sample("/posts/1", 200) is True
+    assert should_sample("/posts", 500) is True
+    assert should_sample("/health", 200) is True
+
+# Test tracebacks survive queueing as their own field
+def test_json_formatter_keeps_exc_info():
+    handler = DroppingQueueHandler(queue.Queue())
+    logger = logging.getLogger("test.exc_info")
+    logger.propagate = False
+    logger.addHandler(handler)
+    try:
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            logger.exception("failed")
+    finally:
+        logger.removeHandler(handler)
+
+    entry = json.loads(JsonFormatter().format(handler.queue.get_nowait()))
+    assert entry["message"] == "failed"
+    assert "ValueError: boom" in entry["exc_info"]
+
+# Test dropped log lines are reported on /health
+def test_health_reports_dropped_logs(client):
+    response = client.get("/health")
+    assert response.status_code == 200
+    assert response.json()["dropped_logs"] >= 0
@@ -117,4 +117,15 @@ def test_logout_redirect(client):
     response = client.get("/logout", follow_redirects=False)
     assert response.status_code == 307
     assert "auth0" in response.headers["location"].lower()
-    assert "logout" in response.headers["location"].lower()
\ No newline at end of file
+    assert "logout" in response.headers["location"].lower()
+
+# Test prepared query stats count compiled cache hits
+def test_query_cache_stats(client):
+    client.get("/posts")
+    client.get("/posts")
+
+    response = client.get("/health/queries")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["statements"]["post_list"]["currsize"] >= 1
+    assert data["compiled"]["post_list"]["hits"] >= 1
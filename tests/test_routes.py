@@ -211,4 +211,168 @@ def test_create_post_persists(client, session):
 
     posts = session.exec(select(Post)).all()
     assert len(posts) == 1
-    assert posts[0].content == "Persistent post"
\ No newline at end of file
+    assert posts[0].content == "Persistent post"
+
+# Test POST and PATCH return timestamps in the same format
+def test_create_and_update_post_timestamp_format(client, session):
+    user = User(email="testuser@example.com")
+    session.add(user)
+    session.commit()
+
+    created = client.post("/posts", json={"content": "Timestamps"}).json()
+    updated = client.patch(f"/posts/{created['id']}", json={"content": "Edited"}).json()
+
+    assert created["created_at"] == updated["created_at"]
+    for data in (created, updated):
+        assert not data["created_at"].endswith("Z")
+        assert not data["updated_at"].endswith("Z")
+
+# Test projecting the posts list down to ids and timestamps
+def test_get_all_posts_fields_projection(client, session):
+    user = User(email="test@example.com")
+    session.add(user)
+    session.commit()
+    session.refresh(user)
+
+    post = Post(content="Projected post", user_id=user.id)
+    session.add(post)
+    session.commit()
+    session.refresh(post)
+
+    response = client.get("/posts?fields=id,created_at")
+
+    assert response.status_code == 200
+    posts = response.json()
+    assert len(posts) == 1
+    assert set(posts[0]) == {"id", "created_at"}
+    assert posts[0]["id"] == post.id
+
+# Test projecting a single post without content
+def test_read_post_fields_projection(client, session):
+    user = User(email="test@example.com")
+    session.add(user)
+    session.commit()
+    session.refresh(user)
+
+    post = Post(content="Hidden content", user_id=user.id)
+    session.add(post)
+    session.commit()
+    session.refresh(post)
+
+    response = client.get(f"/posts/{post.id}?fields=id,user")
+
+    assert response.status_code == 200
+    assert response.json() == {
+        "id": post.id,
+        "user": {"id": user.id, "email": "test@example.com"}
+    }
+
+    response = client.get(f"/user/{user.id}/posts?fields=id")
+    assert response.status_code == 200
+    assert response.json() == {
+        "email": "test@example.com",
+        "posts": [{"id": post.id}]
+    }
+
+# Test that unknown fields are rejected
+def test_read_post_fields_invalid(client):
+    response = client.get("/posts/1/info?fields=password")
+    assert response.status_code == 400
+
+# Test a retried POST with the same Idempotency-Key doesn't create a duplicate
+def test_create_post_idempotency_key_replay(client, session):
+    user = User(email="testuser@example.com")
+    session.add(user)
+    session.commit()
+
+    headers = {"Idempotency-Key": "create-1"}
+    first = client.post("/posts", json={"content": "Only once"}, headers=headers)
+    second = client.post("/posts", json={"content": "Only once"}, headers=headers)
+
+    assert first.status_code == 200
+    assert second.status_code == 200
+    assert second.json() == first.json()
+    assert second.headers["Idempotent-Replayed"] == "true"
+    assert len(session.exec(select(Post)).all()) == 1
+
+# Test reusing a key for a different request is rejected
+def test_create_post_idempotency_key_mismatch(client, session):
+    user = User(email="testuser@example.com")
+    session.add(user)
+    session.commit()
+
+    headers = {"Idempotency-Key": "create-2"}
+    client.post("/posts", json={"content": "First"}, headers=headers)
+    response = client.post("/posts", json={"content": "Second"}, headers=headers)
+
+    assert response.status_code == 422
+    assert len(session.exec(select(Post)).all()) == 1
+
+# Test a replayed PATCH returns the stored result without redoing the update
+def test_update_post_idempotency_key_replay(client, session):
+    user = User(email="testuser@example.com")
+    session.add(user)
+    session.commit()
+    session.refresh(user)
+
+    post = Post(content="Original", user_id=user.id)
+    session.add(post)
+    session.commit()
+    session.refresh(post)
+
+    headers = {"Idempotency-Key": "update-1"}
+    first = client.patch(f"/posts/{post.id}", json={"content": "Edited"}, headers=headers)
+
+    # change the post in between, a replay must not overwrite it again
+    post.content = "Changed elsewhere"
+    session.add(post)
+    session.commit()
+
+    second = client.patch(f"/posts/{post.id}", json={"content": "Edited"}, headers=headers)
+
+    assert first.status_code == 200
+    assert second.json() == first.json()
+    session.refresh(post)
+    assert post.content == "Changed elsewhere"
+
+# Test an expired Idempotency-Key is purged and the request runs again
+def test_create_post_idempotency_key_expired(client, session, monkeypatch):
+    import idempotency
+    monkeypatch.setattr(idempotency, "IDEMPOTENCY_TTL", -1)
+    user = User(email="testuser@example.com")
+    session.add(user)
+    session.commit()
+
+    headers = {"Idempotency-Key": "create-3"}
+    client.post("/posts", json={"content": "Again"}, headers=headers)
+    response = client.post("/posts", json={"content": "Again"}, headers=headers)
+
+    assert response.status_code == 200
+    assert "Idempotent-Replayed" not in response.headers
+    assert len(session.exec(select(Post)).all()) == 2
+
+# Test a replay uses the stored status code and the browser can read the replay header
+def test_create_post_idempotency_replay_status_and_cors(client, session):
+    import idempotency
+    user = User(email="testuser@example.com")
+    session.add(user)
+    session.commit()
+    session.refresh(user)
+
+    body = '{"id":7,"content":"Stored","user_id":%d,"created_at":"2026-01-01T00:00:00","updated_at":"2026-01-01T00:00:00"}' % user.id
+    idempotency.save(
+        session, user.id, "create-4",
+        idempotency.request_hash("POST", "/posts", '{"content":"Stored"}'),
+        body, status_code=201,
+    )
+    session.commit()
+
+    response = client.post(
+        "/posts", json={"content": "Stored"},
+        headers={"Idempotency-Key": "create-4", "Origin": "http://localhost:5173"},
+    )
+
+    assert response.status_code == 201
+    assert response.json()["id"] == 7
+    assert "Idempotent-Replayed" in response.headers["access-control-expose-headers"]
+    assert len(session.exec(select(Post)).all()) == 0
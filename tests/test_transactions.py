@@ -0,0 +1,145 @@
+import sqlite3
+import statistics
+import threading
+import time
+
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+from sqlalchemy.exc import OperationalError
+from sqlmodel import Session, SQLModel, select
+
+import routes
+import transactions
+from database import create_db_engine
+from main import app, get_session
+from models import Post, User
+from routes import require_login
+from transactions import run_write
+
+
+def locked_error():
+    return OperationalError("INSERT", {}, sqlite3.OperationalError("database is locked"))
+
+
+# Test a locked write is retried and then commits
+def test_run_write_retries_locked(session, monkeypatch):
+    monkeypatch.setattr(transactions, "backoff_delay", lambda attempt: 0)
+    transactions.reset_write_stats()
+    calls = []
+
+    def write():
+        calls.append(1)
+        if len(calls) < 3:
+            raise locked_error()
+        session.add(User(email="retry@example.com"))
+
+    run_write(session, write)
+
+    assert len(calls) == 3
+    assert session.exec(select(User).where(User.email == "retry@example.com")).first()
+    stats = transactions.write_stats()
+    assert stats["retries"] == 2
+    assert stats["commits"] == 1
+
+
+# Test a write that stays locked gives up with a 503
+def test_run_write_gives_up(session, monkeypatch):
+    monkeypatch.setattr(transactions, "backoff_delay", lambda attempt: 0)
+
+    def write():
+        raise locked_error()
+
+    with pytest.raises(HTTPException) as exc:
+        run_write(session, write, retries=2)
+    assert exc.value.status_code == 503
+
+
+# Test a held write lock fails fast, the backoff policy bounds the wait
+def test_run_write_locked_database_gives_up_quickly(tmp_path):
+    engine = make_engine(tmp_path / "locked.db")
+    holder = sqlite3.connect(tmp_path / "locked.db")
+    holder.execute("BEGIN IMMEDIATE")
+    start = time.perf_counter()
+    try:
+        with Session(engine) as session:
+            with pytest.raises(HTTPException) as exc:
+                run_write(session, lambda: session.add(User(email="late@example.com")), retries=2)
+    finally:
+        holder.rollback()
+        holder.close()
+        engine.dispose()
+
+    assert exc.value.status_code == 503
+    # three attempts at the 0.1 s busy timeout plus backoff, not 3 x 5 s
+    assert time.perf_counter() - start < 2
+
+
+def plain_write(session, work, retries=None):
+    # the routes before the helper: deferred BEGIN, no retry, only the busy timeout
+    result = work()
+    session.commit()
+    return result
+
+
+def hammer(engine, threads=8, requests=15):
+    def get_session_override():
+        with Session(engine) as session:
+            yield session
+
+    app.dependency_overrides[get_session] = get_session_override
+    app.dependency_overrides[require_login] = lambda: {"email": "stress@example.com"}
+    latencies, errors = [], []
+    lock = threading.Lock()
+
+    def worker():
+        client = TestClient(app, raise_server_exceptions=False)
+        for _ in range(requests):
+            start = time.perf_counter()
+            response = client.post("/posts", json={"content": "stress"})
+            if response.status_code == 200:
+                post_id = response.json()["id"]
+                response = client.patch(f"/posts/{post_id}", json={"content": "edited"})
+            if response.status_code == 200:
+                response = client.delete(f"/posts/{post_id}")
+            with lock:
+                latencies.append(time.perf_counter() - start)
+                if response.status_code != 200:
+                    errors.append(response.status_code)
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    app.dependency_overrides.clear()
+    return errors, len(errors) / len(latencies), statistics.quantiles(latencies, n=100)[98]
+
+
+def make_engine(path):
+    # built like the app's engine, so the busy timeout and WAL mode match production
+    engine = create_db_engine(f"sqlite:///{path}")
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        session.add(User(email="stress@example.com"))
+        session.commit()
+    return engine
+
+
+# Stress the write routes from many threads, with and without the retry helper
+def test_write_routes_under_contention(tmp_path, monkeypatch):
+    engine = make_engine(tmp_path / "without.db")
+    monkeypatch.setattr(routes, "run_write", plain_write)
+    _, without_rate, without_p99 = hammer(engine)
+    engine.dispose()
+
+    monkeypatch.undo()
+    engine = make_engine(tmp_path / "with.db")
+    errors, with_rate, with_p99 = hammer(engine)
+    engine.dispose()
+
+    print(f"\nwithout helper: error rate {without_rate:.1%}, p99 {without_p99 * 1000:.1f}ms"
+          f"\nwith helper:    error rate {with_rate:.1%}, p99 {with_p99 * 1000:.1f}ms")
+    # lock errors no longer surface as 500s, at worst a bounded retry gives up with a 503
+    assert 500 not in errors
+    assert with_rate < without_rate
@@ -0,0 +1,111 @@
+import logging
+import os
+import random
+import threading
+import time
+from collections import Counter
+from fastapi import HTTPException
+from sqlalchemy import event
+from sqlalchemy.exc import OperationalError
+
+logger = logging.getLogger("api.transactions")
+
+# retries after the first attempt when SQLite reports the database is locked
+WRITE_RETRIES = int(os.getenv("WRITE_RETRIES", "5"))
+# exponential backoff with full jitter, in seconds
+BACKOFF_BASE = float(os.getenv("WRITE_BACKOFF_BASE", "0.01"))
+BACKOFF_CAP = float(os.getenv("WRITE_BACKOFF_CAP", "0.5"))
+
+IMMEDIATE = {"sqlite_begin": "IMMEDIATE"}
+
+_stats = Counter()
+_stats_lock = threading.Lock()
+
+
+def enable_begin_immediate(engine):
+    """Let sessions ask for BEGIN IMMEDIATE on a SQLite engine.
+
+    pysqlite normally issues a deferred BEGIN itself, so take over and emit
+    BEGIN from SQLAlchemy, using the connection's sqlite_begin option.
+    """
+    @event.listens_for(engine, "connect")
+    def _disable_pysqlite_begin(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine, "begin")
+    def _begin(conn):
+        mode = conn.get_execution_options().get("sqlite_begin")
+        conn.exec_driver_sql(f"BEGIN {mode}" if mode else "BEGIN")
+
+
+def is_locked(exc):
+    return "database is locked" in str(exc.orig) or "database is busy" in str(exc.orig)
+
+
+def backoff_delay(attempt):
+    return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** (attempt - 1)))
+
+
+def _record(**counts):
+    with _stats_lock:
+        _stats.update(counts)
+
+
+def run_write(session, work, retries=None):
+    """Run work() and commit in one write transaction, retrying while SQLite is locked.
+
+    work does the transaction's reads as well as its writes, so that the
+    whole unit starts with BEGIN IMMEDIATE and can be replayed on a retry.
+    """
+    retries = WRITE_RETRIES if retries is None else retries
+    attempt = 0
+    while True:
+        attempt += 1
+        start = time.perf_counter()
+        try:
+            # open the transaction up front, taking SQLite's write lock.
+            # a transaction the caller already started is joined as is
+            if not session.in_transaction():
+                session.connection(execution_options=IMMEDIATE)
+            result = work()
+            session.commit()
+        except OperationalError as exc:
+            session.rollback()
+            elapsed = time.perf_counter() - start
+            if not is_locked(exc):
+                raise
+            if attempt > retries:
+                _record(attempts=1, locked=1, failures=1, attempt_seconds=elapsed)
+                logger.warning("Write gave up, database locked", extra={"attempts": attempt})
+                raise HTTPException(
+                    status_code=503,
+                    detail="Database is busy, please retry",
+                    headers={"Retry-After": "1"},
+                )
+            delay = backoff_delay(attempt)
+            _record(attempts=1, locked=1, retries=1, attempt_seconds=elapsed, backoff_seconds=delay)
+            logger.info(
+                "Database locked, retrying write",
+                extra={"attempt": attempt, "attempt_ms": round(elapsed * 1000, 2), "backoff_ms": round(delay * 1000, 2)},
+            )
+            time.sleep(delay)
+            continue
+        except Exception:
+            session.rollback()
+            raise
+        _record(attempts=1, commits=1, attempt_seconds=time.perf_counter() - start)
+        return result
+
+
+def write_stats():
+    """Counters for write transactions since startup"""
+    with _stats_lock:
+        return {
+            key: round(_stats[key], 6) if key.endswith("seconds") else _stats[key]
+            for key in ("commits", "attempts", "retries", "locked", "failures", "attempt_seconds", "backoff_seconds")
+        }
+
+
+def reset_write_stats():
+    with _stats_lock:
+        _stats.clear()